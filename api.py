@@ -0,0 +1,134 @@
+import math
+import sqlite3
+from datetime import date
+from functools import wraps
+from flask import Blueprint, current_app, request, jsonify, g
+from werkzeug.security import check_password_hash
+import connection_pool
+from database import (
+    get_user_by_email, create_api_token, revoke_api_token,
+    DatabaseBusyError, InsufficientStockError, ProductNotFoundError
+)
+from models import Sale
+from routes import register_sale
+
+api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
+
+MAX_STOCK_IDS = 500
+
+def _is_int(value) -> bool:
+    """JSON integer check (bool is an int subclass in Python)"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def token_required(f):
+    """Decorator to require a valid API token (Authorization: Bearer <token>)"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        auth = request.headers.get('Authorization', '')
+        if not auth.startswith('Bearer '):
+            return jsonify({'error': 'Missing API token'}), 401
+        token = auth[len('Bearer '):].strip()
+        user = connection_pool.get_user_by_api_token(token)
+        if not user:
+            return jsonify({'error': 'Invalid API token'}), 401
+        g.api_user = user
+        g.api_token = token
+        return f(*args, **kwargs)
+    return decorated_function
+
+@api_bp.route('/token', methods=['POST'])
+def issue_token():
+    """Exchange email and password for an API token"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Invalid credentials data'}), 400
+    email = data.get('email')
+    password = data.get('password')
+    if not isinstance(email, str) or not isinstance(password, str):
+        return jsonify({'error': 'Invalid credentials data'}), 400
+
+    user = get_user_by_email(email)
+    if not user or not check_password_hash(user.senha_hash, password):
+        return jsonify({'error': 'Invalid credentials'}), 401
+    ttl = current_app.config['API_TOKEN_TTL']
+    token = create_api_token(user.id, ttl)
+    return jsonify({'token': token, 'expires_in': ttl}), 201
+
+@api_bp.route('/token', methods=['DELETE'])
+@token_required
+def revoke_token():
+    """Revoke the token used for this request"""
+    revoke_api_token(g.api_token)
+    return '', 204
+
+@api_bp.route('/products/<int:product_id>')
+@token_required
+def get_product(product_id):
+    """Get product details"""
+    product = connection_pool.get_product_by_id(product_id)
+    if product:
+        return jsonify({
+            'id': product.id,
+            'nome': product.nome,
+            'categoria': product.categoria,
+            'quantidade': product.quantidade,
+            'valor_venda': product.valor_venda
+        })
+    return jsonify({'error': 'Product not found'}), 404
+
+@api_bp.route('/stock')
+@token_required
+def get_stock():
+    """Get stock for several products, e.g. /api/v1/stock?ids=1,2,3"""
+    try:
+        product_ids = [int(i) for i in request.args.get('ids', '').split(',') if i.strip()]
+    except ValueError:
+        return jsonify({'error': 'Invalid product ids'}), 400
+    if len(product_ids) > MAX_STOCK_IDS:
+        return jsonify({'error': f'At most {MAX_STOCK_IDS} ids per request'}), 400
+
+    stock = connection_pool.get_stock(product_ids)
+    return jsonify({'stock': {str(product_id): qty for product_id, qty in stock.items()}})
+
+@api_bp.route('/sales', methods=['POST'])
+@token_required
+def submit_sale():
+    """Register a sale"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Invalid sale data'}), 400
+
+    produto_id = data.get('produto_id')
+    quantidade = data.get('quantidade')
+    valor_venda = data.get('valor_venda')
+    if not _is_int(produto_id) or not _is_int(quantidade):
+        return jsonify({'error': 'produto_id and quantidade must be integers'}), 400
+    if quantidade <= 0:
+        return jsonify({'error': 'Quantity must be greater than zero'}), 400
+    if (isinstance(valor_venda, bool) or not isinstance(valor_venda, (int, float))
+            or not math.isfinite(valor_venda) or valor_venda < 0):
+        return jsonify({'error': 'valor_venda must be a non-negative number'}), 400
+    try:
+        data_venda = date.fromisoformat(data.get('data_venda'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'data_venda must be an ISO date (YYYY-MM-DD)'}), 400
+
+    sale = Sale(
+        produto_id=produto_id,
+        quantidade=quantidade,
+        valor_venda=float(valor_venda),
+        data_venda=data_venda.isoformat()
+    )
+
+    try:
+        sale_id = register_sale(sale)
+    except InsufficientStockError:
+        return jsonify({'error': 'Insufficient stock'}), 409
+    except ProductNotFoundError:
+        return jsonify({'error': 'Product not found'}), 404
+    except (TimeoutError, DatabaseBusyError):
+        return jsonify({'error': 'Sale registration timed out'}), 503
+    except sqlite3.Error:
+        current_app.logger.exception('Sale registration failed')
+        return jsonify({'error': 'Sale registration failed'}), 503
+    return jsonify({'id': sale_id}), 201
@@ -17,6 +17,25 @@ app.config['SESSION_PERMANENT'] = False
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///inventory.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Single-writer mode: queue sales to one writer thread per process (group commit)
+app.config['SALE_WRITER_ENABLED'] = os.environ.get("SALE_WRITER_ENABLED", "0") == "1"
+app.config['SALE_WRITER_MAX_BATCH'] = int(os.environ.get("SALE_WRITER_MAX_BATCH", "32"))
+app.config['SALE_WRITER_MAX_LATENCY_MS'] = float(os.environ.get("SALE_WRITER_MAX_LATENCY_MS", "5"))
+app.config['SALE_WRITER_TIMEOUT'] = float(os.environ.get("SALE_WRITER_TIMEOUT", "30"))
+
+# Lifetime of /api/v1 bearer tokens; revoke earlier with DELETE /api/v1/token
+app.config['API_TOKEN_TTL'] = int(os.environ.get("API_TOKEN_TTL", "86400"))
+
+# Online maintenance scheduler (backups, PRAGMA optimize, incremental vacuum, integrity checks)
+app.config['MAINTENANCE_ENABLED'] = os.environ.get("MAINTENANCE_ENABLED", "0") == "1"
+app.config['MAINTENANCE_BACKUP_DIR'] = os.environ.get("MAINTENANCE_BACKUP_DIR", "backups")
+app.config['MAINTENANCE_BACKUP_KEEP'] = int(os.environ.get("MAINTENANCE_BACKUP_KEEP", "7"))
+app.config['MAINTENANCE_BACKUP_INTERVAL'] = float(os.environ.get("MAINTENANCE_BACKUP_INTERVAL", "3600"))
+app.config['MAINTENANCE_OPTIMIZE_INTERVAL'] = float(os.environ.get("MAINTENANCE_OPTIMIZE_INTERVAL", "3600"))
+app.config['MAINTENANCE_VACUUM_INTERVAL'] = float(os.environ.get("MAINTENANCE_VACUUM_INTERVAL", "600"))
+app.config['MAINTENANCE_VACUUM_PAGES'] = int(os.environ.get("MAINTENANCE_VACUUM_PAGES", "1000"))
+app.config['MAINTENANCE_CHECK_INTERVAL'] = float(os.environ.get("MAINTENANCE_CHECK_INTERVAL", "86400"))
+
 # Initialize session
 Session(app)
 
@@ -26,4 +45,8 @@ app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 # Import and register routes
 from routes import *
 
+# Token-authenticated JSON API for terminals and integrations
+from api import api_bp
+app.register_blueprint(api_bp)
+
 # Database initialization handled in main.py
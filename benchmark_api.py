@@ -0,0 +1,111 @@
+"""Load test stock polling: session-based /api/product/<id> vs token-based /api/v1.
+
+Start the app first (e.g. gunicorn -k gthread --threads 8 --bind 0.0.0.0:5000 main:app), then:
+python benchmark_api.py --url http://localhost:5000 --product-id 1 [--pollers 50,100,300] [--duration 10]
+
+With --contend-db inventory.db, another connection holds the write lock for 1s
+every 2s and a client submits a sale every 100ms while the pollers run. This
+shows how polls queue behind a request waiting on SQLite in a sync worker.
+"""
+import argparse
+import http.cookiejar
+import json
+import sqlite3
+import threading
+import time
+import urllib.parse
+import urllib.request
+from benchmark_utils import run_concurrent
+
+
+def session_opener(base_url: str, email: str, password: str):
+    """Log in through the HTML form and return an opener carrying the session cookie"""
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+    data = urllib.parse.urlencode({'email': email, 'password': password}).encode()
+    opener.open(f'{base_url}/login', data=data).read()
+    return opener
+
+
+def api_token(base_url: str, email: str, password: str) -> str:
+    """Get an API token from /api/v1/token"""
+    body = json.dumps({'email': email, 'password': password}).encode()
+    req = urllib.request.Request(f'{base_url}/api/v1/token', data=body,
+                                 headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(req) as response:
+        return json.load(response)['token']
+
+
+def revoke_api_token(base_url: str, token: str):
+    """Revoke the benchmark's API token"""
+    req = urllib.request.Request(f'{base_url}/api/v1/token', method='DELETE',
+                                 headers={'Authorization': f'Bearer {token}'})
+    urllib.request.urlopen(req).read()
+
+
+def contend(db_path: str, base_url: str, token: str, product_id: int, stop: threading.Event):
+    """Hold the SQLite write lock periodically while submitting sales through the API"""
+    def locker():
+        conn = sqlite3.connect(db_path, isolation_level=None)
+        while not stop.is_set():
+            conn.execute('BEGIN IMMEDIATE')
+            time.sleep(1.0)
+            conn.execute('COMMIT')
+            stop.wait(1.0)
+        conn.close()
+
+    def seller():
+        body = json.dumps({'produto_id': product_id, 'quantidade': 1, 'valor_venda': 1.0,
+                           'data_venda': time.strftime('%Y-%m-%d')}).encode()
+        req = urllib.request.Request(f'{base_url}/api/v1/sales', data=body, headers={
+            'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'})
+        while not stop.is_set():
+            try:
+                urllib.request.urlopen(req, timeout=30).read()
+            except Exception:
+                pass
+            stop.wait(0.1)
+
+    threads = [threading.Thread(target=locker), threading.Thread(target=seller)]
+    for t in threads:
+        t.start()
+    return threads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--product-id', type=int, default=1)
+    parser.add_argument('--pollers', default='50,100,300')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--email', default='admin@admin.com')
+    parser.add_argument('--password', default='admin123')
+    parser.add_argument('--contend-db', help='database file to hold write locks on during each run')
+    args = parser.parse_args()
+
+    opener = session_opener(args.url, args.email, args.password)
+    token = api_token(args.url, args.email, args.password)
+    token_request = urllib.request.Request(f'{args.url}/api/v1/products/{args.product_id}',
+                                           headers={'Authorization': f'Bearer {token}'})
+
+    modes = {
+        'session': lambda: opener.open(f'{args.url}/api/product/{args.product_id}', timeout=30).read(),
+        'token': lambda: urllib.request.urlopen(token_request, timeout=30).read(),
+    }
+
+    print(f"{'pollers':>7} {'mode':>8} {'req/s':>10} {'p99 ms':>9} {'errors':>7}")
+    try:
+        for pollers in [int(p) for p in args.pollers.split(',')]:
+            for mode, poll in modes.items():
+                stop = threading.Event()
+                contenders = contend(args.contend_db, args.url, token, args.product_id, stop) if args.contend_db else []
+                rate, p99, errors = run_concurrent(pollers, poll, duration=args.duration)
+                stop.set()
+                for t in contenders:
+                    t.join()
+                print(f'{pollers:>7} {mode:>8} {rate:>10.1f} {p99:>9.2f} {errors:>7}')
+    finally:
+        revoke_api_token(args.url, token)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Benchmark sale registration: direct create_sale vs the group-commit SaleWriter.
+
+Usage: python benchmark_sales.py [--sales-per-client 200] [--clients 1,2,4,8,16,32,64]
+"""
+import argparse
+import os
+import tempfile
+from datetime import date
+import database
+from benchmark_utils import run_concurrent
+from models import Product, Sale
+from sale_writer import SaleWriter
+
+
+def run(clients: int, sales_per_client: int, submit) -> tuple[float, float, int]:
+    """Run concurrent clients, return (sales/sec, p99 latency ms, errors)"""
+    product_id = database.create_product(Product(
+        nome='Benchmark', categoria='Bench', quantidade=clients * sales_per_client,
+        valor_compra=1.0, valor_venda=2.0, data_entrada=date.today().isoformat()
+    ))
+
+    def sell():
+        submit(Sale(produto_id=product_id, quantidade=1, valor_venda=2.0,
+                    data_venda=date.today().isoformat()))
+
+    return run_concurrent(clients, sell, iterations=sales_per_client)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sales-per-client', type=int, default=200)
+    parser.add_argument('--clients', default='1,2,4,8,16,32,64')
+    parser.add_argument('--max-batch', type=int, default=32)
+    parser.add_argument('--max-latency-ms', type=float, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DATABASE_FILE = os.path.join(tmp, 'bench.db')
+        database.init_db()
+        writer = SaleWriter(args.max_batch, args.max_latency_ms / 1000)
+
+        modes = {
+            'direct': database.create_sale,
+            'writer': lambda sale: writer.submit(sale).result(),
+        }
+
+        print(f"{'clients':>7} {'mode':>7} {'sales/s':>10} {'p99 ms':>9} {'errors':>7}")
+        for clients in [int(c) for c in args.clients.split(',')]:
+            for mode, submit in modes.items():
+                rate, p99, errors = run(clients, args.sales_per_client, submit)
+                print(f'{clients:>7} {mode:>7} {rate:>10.1f} {p99:>9.2f} {errors:>7}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Shared timing helpers for benchmark_sales.py and benchmark_api.py"""
+import threading
+import time
+from typing import Callable, Optional
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_concurrent(clients: int, call: Callable[[], object], iterations: Optional[int] = None,
+                   duration: Optional[float] = None) -> tuple[float, float, int]:
+    """Run `call` from concurrent client threads, either `iterations` times per
+    client or for `duration` seconds; return (calls/sec, p99 latency ms, errors)"""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration if duration is not None else None
+
+    def client():
+        local = []
+        failed = 0
+        while (len(local) < iterations) if iterations is not None else (time.perf_counter() < stop_at):
+            start = time.perf_counter()
+            try:
+                call()
+            except Exception:
+                failed += 1
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    return len(latencies) / elapsed, percentile(latencies, 99) * 1000, sum(errors)
@@ -0,0 +1,116 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+import database
+from models import User, Product
+
+
+class ConnectionPool:
+    """Small pool of SQLite connections shared by request threads"""
+
+    def __init__(self, size: int = 8):
+        self.size = size
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._path = database.DATABASE_FILE
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._created = 0
+
+    def _acquire(self) -> sqlite3.Connection:
+        with self._lock:
+            # Connections must not be shared across forked gunicorn workers
+            if self._pid != os.getpid() or self._path != database.DATABASE_FILE:
+                self._reset()
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                if self._created < self.size:
+                    self._created += 1
+                    conn = sqlite3.connect(database.DATABASE_FILE, check_same_thread=False)
+                    conn.row_factory = sqlite3.Row
+                    return conn
+            idle = self._idle
+        return idle.get()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection, returning it to the pool afterwards"""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    def run(self, func: Callable, *args):
+        """Run func(conn, *args) with a pooled connection"""
+        with self.connection() as conn:
+            return func(conn, *args)
+
+
+pool = ConnectionPool()
+
+
+def _fetch_user_by_api_token(conn: sqlite3.Connection, token_hash: str) -> Optional[User]:
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT u.*
+        FROM api_tokens t
+        JOIN usuarios u ON t.usuario_id = u.id
+        WHERE t.token_hash = ? AND t.expira_em > CURRENT_TIMESTAMP
+    ''', (token_hash,))
+    row = cursor.fetchone()
+    if row:
+        return User(
+            id=row['id'],
+            nome=row['nome'],
+            email=row['email'],
+            senha_hash=row['senha_hash'],
+            criado_em=row['criado_em']
+        )
+    return None
+
+def _fetch_product(conn: sqlite3.Connection, product_id: int) -> Optional[Product]:
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM produtos WHERE id = ?', (product_id,))
+    row = cursor.fetchone()
+    if row:
+        return Product(
+            id=row['id'],
+            nome=row['nome'],
+            categoria=row['categoria'],
+            quantidade=row['quantidade'],
+            valor_compra=row['valor_compra'],
+            valor_venda=row['valor_venda'],
+            data_entrada=row['data_entrada'],
+            criado_em=row['criado_em']
+        )
+    return None
+
+def _fetch_stock(conn: sqlite3.Connection, product_ids: List[int]) -> Dict[int, int]:
+    cursor = conn.cursor()
+    placeholders = ', '.join('?' for _ in product_ids)
+    cursor.execute(f'SELECT id, quantidade FROM produtos WHERE id IN ({placeholders})', product_ids)
+    return {row['id']: row['quantidade'] for row in cursor.fetchall()}
+
+
+def get_user_by_api_token(token: str) -> Optional[User]:
+    """Get the user owning an API token"""
+    return pool.run(_fetch_user_by_api_token, database.hash_api_token(token))
+
+def get_product_by_id(product_id: int) -> Optional[Product]:
+    """Get product by ID"""
+    return pool.run(_fetch_product, product_id)
+
+def get_stock(product_ids: List[int]) -> Dict[int, int]:
+    """Get current stock for several products at once"""
+    if not product_ids:
+        return {}
+    return pool.run(_fetch_stock, product_ids)
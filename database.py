@@ -1,5 +1,7 @@
 import sqlite3
 import os
+import hashlib
+import secrets
 from datetime import datetime
 from werkzeug.security import generate_password_hash
 from typing import List, Optional
@@ -7,17 +9,53 @@ from models import User, Product, Sale
 
 DATABASE_FILE = 'inventory.db'
 
+class InsufficientStockError(Exception):
+    """Raised when a sale would leave the product with negative stock"""
+
+    def __init__(self, produto_id: int, quantidade: int):
+        super().__init__(f'Estoque insuficiente para o produto {produto_id} (solicitado: {quantidade})')
+        self.produto_id = produto_id
+        self.quantidade = quantidade
+
+class ProductNotFoundError(Exception):
+    """Raised when a sale refers to a product that does not exist"""
+
+    def __init__(self, produto_id: int):
+        super().__init__(f'Produto {produto_id} não encontrado')
+        self.produto_id = produto_id
+
+class DatabaseBusyError(Exception):
+    """Raised when the database write lock could not be taken in time"""
+
 def get_db_connection():
     """Get database connection"""
     conn = sqlite3.connect(DATABASE_FILE)
     conn.row_factory = sqlite3.Row
     return conn
 
+def checkpoint_wal(mode: str = 'PASSIVE') -> bool:
+    """Copy committed WAL pages back into the main database file
+
+    PASSIVE never waits on readers or writers; TRUNCATE also empties the WAL
+    file but waits for them. Returns True when every WAL page was copied.
+    """
+    conn = get_db_connection()
+    busy, log_pages, checkpointed = conn.execute(f'PRAGMA wal_checkpoint({mode})').fetchone()
+    conn.close()
+    return busy == 0 and log_pages == checkpointed
+
 def init_db():
     """Initialize database with tables and default user"""
     conn = get_db_connection()
     cursor = conn.cursor()
     
+    # Only takes effect on a new, empty database; existing ones are converted
+    # with `python maintenance.py vacuum --convert`
+    cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+    
+    # WAL lets readers (including hot backups) run alongside writers
+    cursor.execute('PRAGMA journal_mode = WAL')
+    
     # Create tables
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS usuarios (
@@ -54,6 +92,32 @@ def init_db():
         )
     ''')
     
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS api_tokens (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario_id INTEGER NOT NULL,
+            token_hash TEXT NOT NULL UNIQUE,
+            criado_em DATETIME DEFAULT CURRENT_TIMESTAMP,
+            expira_em DATETIME,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios(id)
+        )
+    ''')
+    
+    # Tokens issued before expiry existed have no expira_em and count as expired
+    cursor.execute('PRAGMA table_info(api_tokens)')
+    if 'expira_em' not in [row['name'] for row in cursor.fetchall()]:
+        cursor.execute('ALTER TABLE api_tokens ADD COLUMN expira_em DATETIME')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS manutencao (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tarefa TEXT NOT NULL,
+            duracao_ms REAL NOT NULL,
+            resultado TEXT,
+            executado_em DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
     # Create default admin user if not exists
     cursor.execute('SELECT id FROM usuarios WHERE email = ?', ('admin@admin.com',))
     if not cursor.fetchone():
@@ -103,6 +167,39 @@ def get_user_by_id(user_id: int) -> Optional[User]:
         )
     return None
 
+# API token operations
+def hash_api_token(token: str) -> str:
+    """Hash an API token for storage"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def create_api_token(user_id: int, ttl_seconds: int) -> str:
+    """Create a new API token for a user, returning the plain token"""
+    token = secrets.token_urlsafe(32)
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    # Purge expired tokens so the table does not grow with every login
+    cursor.execute('''
+        DELETE FROM api_tokens
+        WHERE expira_em IS NULL OR expira_em <= CURRENT_TIMESTAMP
+    ''')
+    cursor.execute('''
+        INSERT INTO api_tokens (usuario_id, token_hash, expira_em)
+        VALUES (?, ?, datetime('now', ?))
+    ''', (user_id, hash_api_token(token), f'{int(ttl_seconds):+d} seconds'))
+    conn.commit()
+    conn.close()
+    return token
+
+def revoke_api_token(token: str) -> bool:
+    """Revoke an API token"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('DELETE FROM api_tokens WHERE token_hash = ?', (hash_api_token(token),))
+    revoked = cursor.rowcount > 0
+    conn.commit()
+    conn.close()
+    return revoked
+
 # Product operations
 def get_all_products(search: str = "", page: int = 1, per_page: int = 10) -> tuple[List[Product], int]:
     """Get all products with pagination and search"""
@@ -223,6 +320,17 @@ def create_sale(sale: Sale) -> int:
     cursor.execute('BEGIN TRANSACTION')
     
     try:
+        # Update product stock, only if enough is left
+        cursor.execute('''
+            UPDATE produtos SET quantidade = quantidade - ?
+            WHERE id = ? AND quantidade >= ?
+        ''', (sale.quantidade, sale.produto_id, sale.quantidade))
+        if cursor.rowcount == 0:
+            cursor.execute('SELECT 1 FROM produtos WHERE id = ?', (sale.produto_id,))
+            if cursor.fetchone() is None:
+                raise ProductNotFoundError(sale.produto_id)
+            raise InsufficientStockError(sale.produto_id, sale.quantidade)
+        
         # Create sale
         cursor.execute('''
             INSERT INTO vendas (produto_id, quantidade, valor_venda, data_venda)
@@ -230,15 +338,16 @@ def create_sale(sale: Sale) -> int:
         ''', (sale.produto_id, sale.quantidade, sale.valor_venda, sale.data_venda))
         sale_id = cursor.lastrowid or 0
         
-        # Update product stock
-        cursor.execute('''
-            UPDATE produtos SET quantidade = quantidade - ? WHERE id = ?
-        ''', (sale.quantidade, sale.produto_id))
-        
         conn.commit()
         conn.close()
         return sale_id
         
+    except sqlite3.OperationalError as e:
+        conn.rollback()
+        conn.close()
+        if 'locked' in str(e) or 'busy' in str(e):
+            raise DatabaseBusyError('Banco de dados ocupado, tente novamente') from e
+        raise
     except Exception:
         conn.rollback()
         conn.close()
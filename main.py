@@ -1,8 +1,25 @@
+import atexit
 from app import app
-from database import init_db
+from database import init_db, checkpoint_wal
+from maintenance import MaintenanceScheduler
 
 # Initialize database when module is imported
 init_db()
 
+# Leave a self-contained inventory.db (empty WAL) when the process exits
+atexit.register(checkpoint_wal, 'TRUNCATE')
+
+# Start maintenance in one process only; other workers fail to take the lock
+if app.config['MAINTENANCE_ENABLED']:
+    MaintenanceScheduler(
+        backup_dir=app.config['MAINTENANCE_BACKUP_DIR'],
+        backup_keep=app.config['MAINTENANCE_BACKUP_KEEP'],
+        backup_interval=app.config['MAINTENANCE_BACKUP_INTERVAL'],
+        optimize_interval=app.config['MAINTENANCE_OPTIMIZE_INTERVAL'],
+        vacuum_interval=app.config['MAINTENANCE_VACUUM_INTERVAL'],
+        vacuum_pages=app.config['MAINTENANCE_VACUUM_PAGES'],
+        check_interval=app.config['MAINTENANCE_CHECK_INTERVAL']
+    ).start()
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
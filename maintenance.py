@@ -0,0 +1,374 @@
+"""Online database maintenance: hot backups, PRAGMA optimize, incremental vacuum and integrity checks.
+
+CLI usage:
+    python maintenance.py backup [--dest backups] [--keep 7]
+    python maintenance.py optimize [--analyze]
+    python maintenance.py vacuum [--max-pages 1000] [--convert]
+    python maintenance.py check [--full]
+    python maintenance.py stats
+"""
+import argparse
+import fcntl
+import glob
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import database
+
+logger = logging.getLogger(__name__)
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+# Rows sampled per index by scheduled ANALYZE runs
+ANALYSIS_LIMIT = 400
+
+
+def _record(task: str, func: Callable[[], dict]) -> dict:
+    """Run a maintenance task, timing it and storing the result in the manutencao table"""
+    start = time.perf_counter()
+    result = func()
+    duration_ms = (time.perf_counter() - start) * 1000
+    result['duration_ms'] = round(duration_ms, 2)
+
+    conn = database.get_db_connection()
+    try:
+        conn.execute('''
+            INSERT INTO manutencao (tarefa, duracao_ms, resultado)
+            VALUES (?, ?, ?)
+        ''', (task, duration_ms, json.dumps(result)))
+        conn.commit()
+    finally:
+        conn.close()
+
+    logger.info('Maintenance %s finished in %.1f ms: %s', task, duration_ms, result)
+    return result
+
+
+def get_size_stats() -> dict:
+    """Get database file size and page statistics"""
+    conn = database.get_db_connection()
+    try:
+        page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+        page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+        freelist_count = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        auto_vacuum = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+        # Committed pages not yet checkpointed into the main file; measured while
+        # connected because SQLite deletes the WAL when the last connection closes
+        wal_file = f'{database.DATABASE_FILE}-wal'
+        wal_bytes = os.path.getsize(wal_file) if os.path.exists(wal_file) else 0
+    finally:
+        conn.close()
+
+    return {
+        'file_bytes': os.path.getsize(database.DATABASE_FILE),
+        'wal_bytes': wal_bytes,
+        'page_size': page_size,
+        'page_count': page_count,
+        'freelist_count': freelist_count,
+        'free_bytes': freelist_count * page_size,
+        'auto_vacuum': auto_vacuum
+    }
+
+
+def get_maintenance_metrics() -> dict:
+    """Get size statistics and the last run of each maintenance task"""
+    conn = database.get_db_connection()
+    try:
+        rows = conn.execute('''
+            SELECT tarefa, duracao_ms, resultado, executado_em
+            FROM manutencao
+            WHERE id IN (SELECT MAX(id) FROM manutencao GROUP BY tarefa)
+        ''').fetchall()
+    finally:
+        conn.close()
+
+    return {
+        'size': get_size_stats(),
+        'last_runs': {
+            row['tarefa']: {
+                'duration_ms': row['duracao_ms'],
+                'result': json.loads(row['resultado']),
+                'executed_at': row['executado_em']
+            } for row in rows
+        }
+    }
+
+
+def backup(dest_dir: str = 'backups', keep: int = 7, pages: int = 64, sleep: float = 0.005) -> dict:
+    """Take a hot backup with the SQLite backup API, copying a few pages per step
+
+    In WAL mode a read transaction is held on the source for the whole backup,
+    so the copy is a consistent snapshot and sales keep committing meanwhile.
+    Without WAL each step takes its own lock, and SQLite restarts the copy
+    whenever another connection writes; restarts are reported in the result.
+    """
+    def run() -> dict:
+        os.makedirs(dest_dir, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        dest_path = os.path.join(dest_dir, f'inventory-{timestamp}.db')
+        progress = {'steps': 0, 'restarts': 0, 'remaining': None}
+
+        def on_progress(status, remaining, total):
+            progress['steps'] += 1
+            if progress['remaining'] is not None and remaining > progress['remaining']:
+                progress['restarts'] += 1
+            progress['remaining'] = remaining
+
+        src = sqlite3.connect(database.DATABASE_FILE)
+        dst = sqlite3.connect(dest_path)
+        try:
+            wal = src.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+            if wal:
+                src.execute('BEGIN')
+                src.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+            src.backup(dst, pages=pages, progress=on_progress, sleep=sleep)
+        finally:
+            dst.close()
+            src.close()
+
+        # Fold the WAL back into inventory.db without blocking writers
+        checkpointed = database.checkpoint_wal() if wal else None
+        removed = _prune_backups(dest_dir, keep)
+        return {
+            'path': dest_path,
+            'bytes': os.path.getsize(dest_path),
+            'wal': wal,
+            'checkpointed': checkpointed,
+            'steps': progress['steps'],
+            'restarts': progress['restarts'],
+            'pruned': len(removed)
+        }
+
+    return _record('backup', run)
+
+
+def _prune_backups(dest_dir: str, keep: int) -> List[str]:
+    """Delete all but the newest `keep` backups"""
+    backups = sorted(glob.glob(os.path.join(dest_dir, 'inventory-*.db')))
+    removed = backups[:-keep] if keep > 0 else []
+    for path in removed:
+        os.remove(path)
+    return removed
+
+
+def optimize(analyze: bool = False) -> dict:
+    """Refresh query planner statistics
+
+    PRAGMA optimize on a fresh connection only looks at tables that connection
+    has already queried, so it would do nothing here. It is only used on
+    SQLite >= 3.46, whose 0x10002 mask checks every table, once statistics
+    exist. Otherwise a row-limited ANALYZE runs; analyze=True forces a full one.
+    """
+    def run() -> dict:
+        conn = database.get_db_connection()
+        try:
+            has_stats = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            ).fetchone() is not None
+            if analyze:
+                mode = 'analyze'
+                conn.execute('ANALYZE')
+            elif has_stats and sqlite3.sqlite_version_info >= (3, 46, 0):
+                mode = 'optimize'
+                conn.execute('PRAGMA optimize = 0x10002')
+            else:
+                mode = 'limited_analyze'
+                conn.execute(f'PRAGMA analysis_limit = {ANALYSIS_LIMIT}')
+                conn.execute('ANALYZE')
+            conn.commit()
+        finally:
+            conn.close()
+        return {'mode': mode}
+
+    return _record('optimize', run)
+
+
+def incremental_vacuum(max_pages: int = 1000) -> dict:
+    """Return up to `max_pages` free pages to the filesystem"""
+    def run() -> dict:
+        conn = database.get_db_connection()
+        try:
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+                return {'skipped': 'auto_vacuum is not INCREMENTAL'}
+            before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            # execute() steps the pragma once, freeing a single page; run it to completion
+            conn.executescript(f'PRAGMA incremental_vacuum({int(max_pages)});')
+            after = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        finally:
+            conn.close()
+        return {'pages_freed': before - after, 'freelist_count': after}
+
+    return _record('vacuum', run)
+
+
+def enable_incremental_vacuum() -> dict:
+    """Switch an existing database to auto_vacuum=INCREMENTAL
+
+    This needs a full VACUUM, which blocks writers while it runs, so it is only
+    available from the CLI.
+    """
+    def run() -> dict:
+        conn = database.get_db_connection()
+        try:
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == AUTO_VACUUM_INCREMENTAL:
+                return {'converted': False}
+            conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+            conn.execute('VACUUM')
+        finally:
+            conn.close()
+        return {'converted': True}
+
+    return _record('convert', run)
+
+
+def integrity_check(full: bool = False) -> dict:
+    """Run PRAGMA quick_check (or the slower integrity_check)"""
+    def run() -> dict:
+        conn = database.get_db_connection()
+        try:
+            pragma = 'integrity_check' if full else 'quick_check'
+            messages = [row[0] for row in conn.execute(f'PRAGMA {pragma}').fetchall()]
+        finally:
+            conn.close()
+        if messages != ['ok']:
+            logger.error('Database %s failed: %s', pragma, messages)
+        return {'ok': messages == ['ok'], 'full': full, 'messages': messages[:20]}
+
+    return _record('check', run)
+
+
+class MaintenanceScheduler:
+    """Background thread running maintenance tasks at fixed intervals
+
+    Only one process per database runs the tasks: the others fail to take the
+    lock file and their scheduler stays idle.
+    """
+
+    def __init__(self, backup_dir: str = 'backups', backup_keep: int = 7,
+                 backup_interval: float = 3600, optimize_interval: float = 3600,
+                 vacuum_interval: float = 600, vacuum_pages: int = 1000,
+                 check_interval: float = 86400):
+        self.tasks = [
+            ('backup', backup_interval, lambda: backup(backup_dir, backup_keep)),
+            ('optimize', optimize_interval, optimize),
+            ('vacuum', vacuum_interval, lambda: incremental_vacuum(vacuum_pages)),
+            ('check', check_interval, integrity_check),
+        ]
+        self._next_run: Dict[str, float] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock_file = None
+
+    def start(self) -> bool:
+        """Start the scheduler thread if no other process holds the maintenance lock"""
+        lock_file = open(f'{database.DATABASE_FILE}.maintenance.lock', 'w')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+
+        self._lock_file = lock_file
+        self._next_run = self._first_runs()
+        self._thread = threading.Thread(target=self._run, name='maintenance', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """Stop the scheduler thread and release the maintenance lock"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _first_runs(self) -> Dict[str, float]:
+        """Schedule each task one interval after its last recorded run, or now if it never ran
+
+        Counting from process start would let worker recycling postpone
+        maintenance indefinitely.
+        """
+        conn = database.get_db_connection()
+        try:
+            rows = conn.execute('''
+                SELECT tarefa, CAST(strftime('%s', MAX(executado_em)) AS INTEGER) AS ultima
+                FROM manutencao
+                GROUP BY tarefa
+            ''').fetchall()
+        finally:
+            conn.close()
+
+        last_runs = {row['tarefa']: row['ultima'] for row in rows}
+        now, wall_now = time.monotonic(), time.time()
+        return {
+            name: now + max(last_runs[name] + interval - wall_now, 0) if name in last_runs else now
+            for name, interval, _ in self.tasks
+        }
+
+    def _run(self):
+        while not self._stop.is_set():
+            now = time.monotonic()
+            for name, interval, task in self.tasks:
+                if now >= self._next_run[name]:
+                    try:
+                        task()
+                    except Exception:
+                        logger.exception('Maintenance task %s failed', name)
+                    self._next_run[name] = time.monotonic() + interval
+            wait = min(self._next_run.values()) - time.monotonic()
+            self._stop.wait(max(wait, 1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default=database.DATABASE_FILE)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    backup_parser = subparsers.add_parser('backup', help='take a hot backup')
+    backup_parser.add_argument('--dest', default='backups')
+    backup_parser.add_argument('--keep', type=int, default=7)
+    backup_parser.add_argument('--pages', type=int, default=64)
+
+    optimize_parser = subparsers.add_parser('optimize', help='refresh query planner statistics')
+    optimize_parser.add_argument('--analyze', action='store_true')
+
+    vacuum_parser = subparsers.add_parser('vacuum', help='run a bounded incremental vacuum')
+    vacuum_parser.add_argument('--max-pages', type=int, default=1000)
+    vacuum_parser.add_argument('--convert', action='store_true',
+                               help='switch to auto_vacuum=INCREMENTAL first (runs a full VACUUM)')
+
+    check_parser = subparsers.add_parser('check', help='run an integrity check')
+    check_parser.add_argument('--full', action='store_true')
+
+    subparsers.add_parser('stats', help='show size statistics and last runs')
+
+    args = parser.parse_args()
+    database.DATABASE_FILE = args.db
+    database.init_db()
+
+    if args.command == 'backup':
+        result = backup(args.dest, args.keep, args.pages)
+    elif args.command == 'optimize':
+        result = optimize(args.analyze)
+    elif args.command == 'vacuum':
+        conversion = enable_incremental_vacuum() if args.convert else None
+        result = incremental_vacuum(args.max_pages)
+        if conversion is not None:
+            result['convert'] = conversion
+    elif args.command == 'check':
+        result = integrity_check(args.full)
+    else:
+        result = get_maintenance_metrics()
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -3,13 +3,17 @@ from werkzeug.security import check_password_hash
 from datetime import datetime
 import csv
 import io
+import sqlite3
 from app import app
 from database import (
     get_user_by_email, get_user_by_id, get_all_products, get_product_by_id,
     create_product, update_product, delete_product, create_sale, get_all_sales,
-    get_dashboard_stats, get_reports_data
+    get_dashboard_stats, get_reports_data,
+    DatabaseBusyError, InsufficientStockError, ProductNotFoundError
 )
+from maintenance import get_maintenance_metrics
 from models import Product, Sale
+from sale_writer import get_sale_writer
 
 def login_required(f):
     """Decorator to require login for protected routes"""
@@ -20,6 +24,16 @@ def login_required(f):
     decorated_function.__name__ = f.__name__
     return decorated_function
 
+def register_sale(sale: Sale) -> int:
+    """Register a sale directly or through the group-commit writer"""
+    if app.config['SALE_WRITER_ENABLED']:
+        writer = get_sale_writer(app.config['SALE_WRITER_MAX_BATCH'],
+                                 app.config['SALE_WRITER_MAX_LATENCY_MS'] / 1000,
+                                 app.config['SALE_WRITER_TIMEOUT'])
+        # Bounded wait so a stuck writer cannot hold this worker forever
+        return writer.write(sale, app.config['SALE_WRITER_TIMEOUT'])
+    return create_sale(sale)
+
 @app.route('/')
 def index():
     """Redirect to dashboard if logged in, otherwise to login"""
@@ -210,10 +224,23 @@ def add_sale():
                 data_venda=request.form['data_venda']
             )
             
-            create_sale(sale)
+            register_sale(sale)
             flash('Venda registrada com sucesso!', 'success')
             return redirect(url_for('sales'))
             
+        except InsufficientStockError:
+            flash('Estoque insuficiente!', 'error')
+            return render_template('add_sale.html')
+        except ProductNotFoundError:
+            flash('Produto não encontrado!', 'error')
+            return render_template('add_sale.html')
+        except (TimeoutError, DatabaseBusyError):
+            flash('Tempo esgotado ao registrar a venda! A venda não foi registrada, tente novamente.', 'error')
+            return render_template('add_sale.html')
+        except sqlite3.Error:
+            app.logger.exception('Sale registration failed')
+            flash('Erro ao registrar a venda! Tente novamente.', 'error')
+            return render_template('add_sale.html')
         except ValueError:
             flash('Valores inválidos!', 'error')
             return render_template('add_sale.html')
@@ -236,6 +263,12 @@ def get_product_api(product_id):
         })
     return jsonify({'error': 'Product not found'}), 404
 
+@app.route('/api/maintenance')
+@login_required
+def get_maintenance_api():
+    """API endpoint with database size and maintenance timing metrics"""
+    return jsonify(get_maintenance_metrics())
+
 @app.route('/reports')
 @login_required
 def reports():
@@ -0,0 +1,207 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+import database
+from database import DatabaseBusyError, InsufficientStockError, ProductNotFoundError
+from models import Sale
+
+logger = logging.getLogger(__name__)
+
+
+class SaleWriter:
+    """Single writer thread that commits queued sales in small batches (group commit)"""
+
+    def __init__(self, max_batch: int = 32, max_latency: float = 0.005, lock_timeout: float = 30):
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self.lock_timeout = lock_timeout
+        self._queue: "queue.Queue[Tuple[Sale, Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    def submit(self, sale: Sale) -> Future:
+        """Queue a sale; the future resolves to the sale id or raises
+        InsufficientStockError / ProductNotFoundError / DatabaseBusyError"""
+        future: Future = Future()
+        self._queue.put((sale, future))
+        self._ensure_started()
+        return future
+
+    def write(self, sale: Sale, timeout: float) -> int:
+        """Submit a sale and wait for its id
+
+        On timeout the sale is cancelled so it is never committed behind the
+        caller's back. If it is already in a batch being committed, cancelling
+        is impossible and the outcome of that batch is awaited instead.
+        """
+        future = self.submit(sale)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            if future.cancel():
+                raise
+            return future.result()
+
+    def _ensure_started(self):
+        # Start lazily so each gunicorn worker gets its own thread after fork;
+        # a restarted thread drains whatever is still queued
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='sale-writer', daemon=True)
+                self._thread.start()
+
+    def _next_batch(self) -> List[Tuple[Sale, Future]]:
+        batch = [self._queue.get()]
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        # Under concurrent load, wait for more writes until the batch is full
+        # or the latency budget is spent; a lone write is committed right away
+        deadline = time.monotonic() + self.max_latency
+        while 1 < len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        batch: List[Tuple[Sale, Future]] = []
+        try:
+            conn = database.get_db_connection()
+            conn.isolation_level = None
+            # Short busy handler per attempt; _begin retries with backoff
+            conn.execute('PRAGMA busy_timeout = 100')
+            try:
+                while True:
+                    batch = self._next_batch()
+                    self._commit_batch(conn, batch)
+                    batch = []
+            finally:
+                conn.close()
+        except BaseException as e:
+            logger.exception('Sale writer thread stopped')
+            self._fail_pending(batch, e)
+
+    def _fail_pending(self, batch: List[Tuple[Sale, Future]], error: BaseException):
+        """Fail the in-flight batch and everything still queued so no caller waits forever"""
+        pending = list(batch)
+        while True:
+            try:
+                pending.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(error)
+
+    def _begin(self, cursor: sqlite3.Cursor, batch: List[Tuple[Sale, Future]]) -> bool:
+        """Take the write lock, retrying with backoff while another process holds it
+
+        Returns False if every caller cancelled while waiting. Futures stay
+        pending (and cancellable) until the lock is held.
+        """
+        deadline = time.monotonic() + self.lock_timeout
+        delay = 0.01
+        while True:
+            try:
+                cursor.execute('BEGIN IMMEDIATE')
+                return True
+            except sqlite3.OperationalError as e:
+                if 'locked' not in str(e) and 'busy' not in str(e):
+                    raise
+                if time.monotonic() + delay > deadline:
+                    raise DatabaseBusyError('Banco de dados ocupado, tente novamente') from e
+            if all(future.cancelled() for _, future in batch):
+                return False
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    def _commit_batch(self, conn: sqlite3.Connection, batch: List[Tuple[Sale, Future]]):
+        """Apply a batch of sales in one transaction, isolating each sale in a savepoint"""
+        cursor = conn.cursor()
+        try:
+            locked = self._begin(cursor, batch)
+        except Exception as e:
+            logger.warning('Sale batch could not take the write lock: %s', e)
+            for _, future in batch:
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(e)
+            return
+
+        batch = [(sale, future) for sale, future in batch if future.set_running_or_notify_cancel()]
+        if not locked or not batch:
+            if conn.in_transaction:
+                conn.rollback()
+            return
+
+        results: List[Tuple[Future, object]] = []
+        try:
+            for sale, future in batch:
+                cursor.execute('SAVEPOINT sale')
+                try:
+                    cursor.execute('''
+                        UPDATE produtos SET quantidade = quantidade - ?
+                        WHERE id = ? AND quantidade >= ?
+                    ''', (sale.quantidade, sale.produto_id, sale.quantidade))
+                    if cursor.rowcount == 0:
+                        cursor.execute('SELECT 1 FROM produtos WHERE id = ?', (sale.produto_id,))
+                        if cursor.fetchone() is None:
+                            raise ProductNotFoundError(sale.produto_id)
+                        raise InsufficientStockError(sale.produto_id, sale.quantidade)
+
+                    cursor.execute('''
+                        INSERT INTO vendas (produto_id, quantidade, valor_venda, data_venda)
+                        VALUES (?, ?, ?, ?)
+                    ''', (sale.produto_id, sale.quantidade, sale.valor_venda, sale.data_venda))
+                    results.append((future, cursor.lastrowid or 0))
+                    cursor.execute('RELEASE sale')
+                except Exception as e:
+                    cursor.execute('ROLLBACK TO sale')
+                    cursor.execute('RELEASE sale')
+                    results.append((future, e))
+            cursor.execute('COMMIT')
+        except Exception as e:
+            logger.exception('Sale batch commit failed')
+            # Fail callers before rolling back: if the rollback raises too, the
+            # thread stops and the next submit starts a fresh one
+            for _, future in batch:
+                future.set_exception(e)
+            if conn.in_transaction:
+                conn.rollback()
+            return
+
+        # Only resolve callers once the whole batch is durable
+        for future, result in results:
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+_writer: Optional[SaleWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_sale_writer(max_batch: int = 32, max_latency: float = 0.005, lock_timeout: float = 30) -> SaleWriter:
+    """Get the process-wide sale writer"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = SaleWriter(max_batch, max_latency, lock_timeout)
+    return _writer
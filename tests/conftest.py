@@ -0,0 +1,10 @@
+import pytest
+import database
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Fresh database file for each test"""
+    monkeypatch.setattr(database, 'DATABASE_FILE', str(tmp_path / 'inventory.db'))
+    database.init_db()
+    return tmp_path
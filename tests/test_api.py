@@ -0,0 +1,125 @@
+import pytest
+import database
+from app import app
+from models import Product
+
+
+def add_product(quantidade: int) -> int:
+    return database.create_product(Product(
+        nome='Produto', categoria='Teste', quantidade=quantidade,
+        valor_compra=1.0, valor_venda=2.0, data_entrada='2026-01-01'
+    ))
+
+
+def sale_body(produto_id: int, **overrides) -> dict:
+    body = {'produto_id': produto_id, 'quantidade': 1, 'valor_venda': 2.0, 'data_venda': '2026-01-01'}
+    body.update(overrides)
+    return body
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    monkeypatch.setitem(app.config, 'SALE_WRITER_ENABLED', False)
+    return app.test_client()
+
+
+@pytest.fixture
+def auth(client):
+    response = client.post('/api/v1/token', json={'email': 'admin@admin.com', 'password': 'admin123'})
+    assert response.status_code == 201
+    assert response.get_json()['expires_in'] == app.config['API_TOKEN_TTL']
+    return {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+
+def test_token_requires_valid_credentials(client):
+    assert client.post('/api/v1/token', json=['admin@admin.com']).status_code == 400
+    assert client.post('/api/v1/token', json={'email': 'admin@admin.com', 'password': 123}).status_code == 400
+    response = client.post('/api/v1/token', json={'email': 'admin@admin.com', 'password': 'wrong'})
+    assert response.status_code == 401
+
+
+def test_endpoints_reject_missing_or_unknown_tokens(client):
+    assert client.get('/api/v1/products/1').status_code == 401
+    response = client.get('/api/v1/products/1', headers={'Authorization': 'Bearer nope'})
+    assert response.status_code == 401
+    assert response.get_json()['error'] == 'Invalid API token'
+
+
+def test_product_lookup(client, auth):
+    produto_id = add_product(3)
+    response = client.get(f'/api/v1/products/{produto_id}', headers=auth)
+    assert response.status_code == 200
+    assert response.get_json()['quantidade'] == 3
+    assert client.get('/api/v1/products/9999', headers=auth).status_code == 404
+
+
+def test_stock_limits(client, auth):
+    first, second = add_product(3), add_product(7)
+    response = client.get(f'/api/v1/stock?ids={first},{second},9999', headers=auth)
+    assert response.get_json() == {'stock': {str(first): 3, str(second): 7}}
+
+    assert client.get('/api/v1/stock?ids=1,x', headers=auth).status_code == 400
+    ids = ','.join(str(i) for i in range(1, 502))
+    assert client.get(f'/api/v1/stock?ids={ids}', headers=auth).status_code == 400
+    assert client.get('/api/v1/stock', headers=auth).get_json() == {'stock': {}}
+
+
+def test_sale_submission(client, auth):
+    produto_id = add_product(2)
+    response = client.post('/api/v1/sales', json=sale_body(produto_id, quantidade=2), headers=auth)
+    assert response.status_code == 201
+    assert response.get_json()['id'] > 0
+    assert database.get_product_by_id(produto_id).quantidade == 0
+
+    response = client.post('/api/v1/sales', json=sale_body(produto_id), headers=auth)
+    assert response.status_code == 409
+    response = client.post('/api/v1/sales', json=sale_body(9999), headers=auth)
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize('overrides', [
+    {'produto_id': '1'},
+    {'quantidade': 2.5},
+    {'quantidade': True},
+    {'quantidade': 0},
+    {'valor_venda': -1},
+    {'valor_venda': 'NaN'},
+    {'data_venda': None},
+    {'data_venda': 'ontem'},
+])
+def test_sale_submission_rejects_invalid_fields(client, auth, overrides):
+    produto_id = add_product(5)
+    body = {**sale_body(produto_id), **overrides}
+    response = client.post('/api/v1/sales', json=body, headers=auth)
+    assert response.status_code == 400
+    assert database.get_product_by_id(produto_id).quantidade == 5
+
+
+def test_sale_submission_rejects_nan_price(client, auth):
+    produto_id = add_product(5)
+    body = '{"produto_id": %d, "quantidade": 1, "valor_venda": NaN, "data_venda": "2026-01-01"}' % produto_id
+    response = client.post('/api/v1/sales', data=body, content_type='application/json', headers=auth)
+    assert response.status_code == 400
+    assert database.get_all_sales()[1] == 0
+
+
+def test_expired_token_is_rejected(client):
+    token = database.create_api_token(1, -1)
+    response = client.get('/api/v1/stock', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 401
+
+
+def test_issuing_a_token_purges_expired_ones(client):
+    database.create_api_token(1, -1)
+    database.create_api_token(1, 3600)
+    conn = database.get_db_connection()
+    try:
+        assert conn.execute('SELECT COUNT(*) FROM api_tokens').fetchone()[0] == 1
+    finally:
+        conn.close()
+
+
+def test_revoked_token_is_rejected(client, auth):
+    assert client.get('/api/v1/stock', headers=auth).status_code == 200
+    assert client.delete('/api/v1/token', headers=auth).status_code == 204
+    assert client.get('/api/v1/stock', headers=auth).status_code == 401
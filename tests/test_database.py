@@ -0,0 +1,60 @@
+import threading
+import pytest
+import database
+from database import InsufficientStockError, ProductNotFoundError
+from models import Product, Sale
+
+
+def add_product(quantidade: int) -> int:
+    return database.create_product(Product(
+        nome='Produto', categoria='Teste', quantidade=quantidade,
+        valor_compra=1.0, valor_venda=2.0, data_entrada='2026-01-01'
+    ))
+
+
+def make_sale(produto_id: int, quantidade: int = 1) -> Sale:
+    return Sale(produto_id=produto_id, quantidade=quantidade, valor_venda=2.0, data_venda='2026-01-01')
+
+
+def test_create_sale_updates_stock(db):
+    produto_id = add_product(3)
+    assert database.create_sale(make_sale(produto_id, 2)) > 0
+    assert database.get_product_by_id(produto_id).quantidade == 1
+
+
+def test_create_sale_rejects_insufficient_stock(db):
+    produto_id = add_product(1)
+    with pytest.raises(InsufficientStockError):
+        database.create_sale(make_sale(produto_id, 2))
+    assert database.get_product_by_id(produto_id).quantidade == 1
+    assert database.get_all_sales()[1] == 0
+
+
+def test_create_sale_rejects_missing_product(db):
+    with pytest.raises(ProductNotFoundError):
+        database.create_sale(make_sale(9999))
+
+
+def test_concurrent_sales_never_oversell(db):
+    produto_id = add_product(5)
+    results = []
+    lock = threading.Lock()
+
+    def sell():
+        try:
+            database.create_sale(make_sale(produto_id))
+            outcome = 'sold'
+        except InsufficientStockError:
+            outcome = 'refused'
+        with lock:
+            results.append(outcome)
+
+    threads = [threading.Thread(target=sell) for _ in range(30)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results.count('sold') == 5
+    assert results.count('refused') == 25
+    assert database.get_product_by_id(produto_id).quantidade == 0
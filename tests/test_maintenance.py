@@ -0,0 +1,151 @@
+import sqlite3
+import threading
+import time
+import database
+import maintenance
+from models import Product, Sale
+
+
+def fill_products(rows: int, name_size: int = 200):
+    conn = database.get_db_connection()
+    conn.executemany('''
+        INSERT INTO produtos (nome, categoria, quantidade, valor_compra, valor_venda, data_entrada)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', [('p' * name_size, f'c{i % 10}', 1_000_000, 1.0, 2.0, '2026-01-01') for i in range(rows)])
+    conn.commit()
+    conn.close()
+
+
+def test_sales_keep_committing_during_backup(db):
+    fill_products(120_000)
+    assert maintenance.get_size_stats()['file_bytes'] > 20 * 1024 * 1024
+
+    stop = threading.Event()
+    started = threading.Event()
+    sale_ids = []
+    errors = []
+
+    def seller():
+        while not stop.is_set():
+            try:
+                sale_ids.append(database.create_sale(Sale(
+                    produto_id=1, quantidade=1, valor_venda=2.0, data_venda='2026-01-01'
+                )))
+            except Exception as e:
+                errors.append(e)
+            started.set()
+
+    thread = threading.Thread(target=seller)
+    thread.start()
+    try:
+        assert started.wait(5)
+        sales_before = len(sale_ids)
+        result = maintenance.backup(str(db / 'backups'), pages=16)
+        sales_during = len(sale_ids) - sales_before
+    finally:
+        stop.set()
+        thread.join()
+
+    assert sales_during > 0
+    assert errors == []
+    assert result['restarts'] == 0
+
+    backup = sqlite3.connect(result['path'])
+    try:
+        assert backup.execute('PRAGMA quick_check').fetchone()[0] == 'ok'
+        assert backup.execute('SELECT COUNT(*) FROM produtos').fetchone()[0] == 120_000
+    finally:
+        backup.close()
+
+
+def test_backup_prunes_old_copies(db):
+    dest = str(db / 'backups')
+    for _ in range(3):
+        result = maintenance.backup(dest, keep=2)
+    assert result['pruned'] == 1
+    assert len(list((db / 'backups').glob('inventory-*.db'))) == 2
+
+
+def test_optimize_creates_planner_statistics(db):
+    fill_products(2000, name_size=10)
+    conn = database.get_db_connection()
+    conn.execute('CREATE INDEX idx_produtos_categoria ON produtos (categoria)')
+    conn.commit()
+    conn.close()
+
+    maintenance.optimize()
+
+    conn = database.get_db_connection()
+    try:
+        stats = conn.execute('SELECT idx FROM sqlite_stat1').fetchall()
+    finally:
+        conn.close()
+    assert 'idx_produtos_categoria' in [row['idx'] for row in stats]
+
+
+def test_incremental_vacuum_frees_bounded_pages(db):
+    fill_products(20_000)
+    conn = database.get_db_connection()
+    conn.execute('DELETE FROM produtos')
+    conn.commit()
+    conn.close()
+    free_before = maintenance.get_size_stats()['freelist_count']
+
+    result = maintenance.incremental_vacuum(max_pages=100)
+
+    assert result['pages_freed'] == 100
+    assert result['freelist_count'] == free_before - 100
+
+
+def test_integrity_check_and_metrics(db):
+    assert maintenance.integrity_check()['ok']
+
+    metrics = maintenance.get_maintenance_metrics()
+    assert metrics['size']['auto_vacuum'] == maintenance.AUTO_VACUUM_INCREMENTAL
+    assert metrics['last_runs']['check']['result']['ok']
+
+
+def test_scheduler_runs_in_one_process_only(db):
+    first = maintenance.MaintenanceScheduler()
+    second = maintenance.MaintenanceScheduler()
+    try:
+        assert first.start()
+        assert not second.start()
+    finally:
+        first.stop()
+
+
+def test_scheduler_resumes_from_last_recorded_runs(db):
+    conn = database.get_db_connection()
+    conn.executemany('''
+        INSERT INTO manutencao (tarefa, duracao_ms, resultado, executado_em)
+        VALUES (?, 1, '{}', datetime('now', ?))
+    ''', [('backup', '-2 hours'), ('optimize', '-10 minutes')])
+    conn.commit()
+    conn.close()
+
+    scheduler = maintenance.MaintenanceScheduler(backup_interval=3600, optimize_interval=3600,
+                                                 vacuum_interval=600)
+    now = time.monotonic()
+    next_run = scheduler._first_runs()
+
+    assert next_run['backup'] <= now + 1
+    assert 3000 - 2 <= next_run['optimize'] - now <= 3000 + 2
+    assert next_run['vacuum'] <= now + 1
+    assert next_run['check'] <= now + 1
+
+
+def test_size_stats_report_wal_bytes(db):
+    assert maintenance.get_size_stats()['wal_bytes'] == 0
+
+    # An open connection keeps SQLite from checkpointing and deleting the WAL
+    reader = database.get_db_connection()
+    try:
+        reader.execute('SELECT COUNT(*) FROM produtos').fetchone()
+        fill_products(1000)
+        assert maintenance.get_size_stats()['wal_bytes'] > 0
+
+        assert database.checkpoint_wal('TRUNCATE')
+        assert maintenance.get_size_stats()['wal_bytes'] == 0
+    finally:
+        reader.close()
@@ -0,0 +1,155 @@
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+import pytest
+import database
+from database import DatabaseBusyError, InsufficientStockError, ProductNotFoundError
+from models import Product, Sale
+from sale_writer import SaleWriter
+
+
+def add_product(quantidade: int) -> int:
+    return database.create_product(Product(
+        nome='Produto', categoria='Teste', quantidade=quantidade,
+        valor_compra=1.0, valor_venda=2.0, data_entrada='2026-01-01'
+    ))
+
+
+def make_sale(produto_id: int, quantidade: int = 1) -> Sale:
+    return Sale(produto_id=produto_id, quantidade=quantidade, valor_venda=2.0, data_venda='2026-01-01')
+
+
+def stock(produto_id: int) -> int:
+    return database.get_product_by_id(produto_id).quantidade
+
+
+def sale_count() -> int:
+    return database.get_all_sales()[1]
+
+
+def hold_write_lock(seconds: float):
+    """Hold the write lock from another connection for a while"""
+    conn = sqlite3.connect(database.DATABASE_FILE, isolation_level=None, check_same_thread=False)
+    conn.execute('BEGIN IMMEDIATE')
+    timer = threading.Timer(seconds, lambda: (conn.execute('COMMIT'), conn.close()))
+    timer.start()
+    return timer
+
+
+def test_insufficient_stock_only_rolls_back_its_own_sale(db):
+    produto_id = add_product(2)
+    batch = [(make_sale(produto_id), Future()),
+             (make_sale(produto_id, 5), Future()),
+             (make_sale(produto_id), Future())]
+
+    conn = database.get_db_connection()
+    conn.isolation_level = None
+    try:
+        SaleWriter()._commit_batch(conn, batch)
+    finally:
+        conn.close()
+
+    first, failed, last = [future for _, future in batch]
+    assert first.result() > 0
+    assert last.result() > first.result()
+    with pytest.raises(InsufficientStockError):
+        failed.result()
+    assert stock(produto_id) == 0
+    assert sale_count() == 2
+
+
+def test_missing_product_and_insufficient_stock_are_distinct(db):
+    produto_id = add_product(1)
+    writer = SaleWriter()
+
+    with pytest.raises(ProductNotFoundError):
+        writer.write(make_sale(9999), timeout=5)
+    with pytest.raises(InsufficientStockError):
+        writer.write(make_sale(produto_id, 2), timeout=5)
+    assert writer.write(make_sale(produto_id), timeout=5) > 0
+    assert stock(produto_id) == 0
+
+
+def test_dead_writer_fails_every_pending_sale(db, monkeypatch):
+    produto_id = add_product(10)
+
+    def broken_connection():
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr(database, 'get_db_connection', broken_connection)
+    writer = SaleWriter()
+    futures = [writer.submit(make_sale(produto_id)) for _ in range(5)]
+
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
+
+
+def test_fail_pending_drains_the_queue(db):
+    writer = SaleWriter()
+    in_flight = [(make_sale(1), Future())]
+    queued = [Future() for _ in range(3)]
+    for future in queued:
+        writer._queue.put((make_sale(1), future))
+
+    writer._fail_pending(in_flight, RuntimeError('boom'))
+
+    for future in [in_flight[0][1]] + queued:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=0)
+    assert writer._queue.empty()
+
+
+def test_timed_out_sale_is_not_committed(db):
+    produto_id = add_product(5)
+    writer = SaleWriter(lock_timeout=10)
+    timer = hold_write_lock(1.0)
+
+    with pytest.raises(TimeoutError):
+        writer.write(make_sale(produto_id), timeout=0.2)
+    timer.join()
+    time.sleep(0.5)
+
+    assert stock(produto_id) == 5
+    assert sale_count() == 0
+
+
+def test_cancelled_future_is_skipped(db):
+    produto_id = add_product(5)
+    cancelled = Future()
+    cancelled.cancel()
+    kept = Future()
+
+    conn = database.get_db_connection()
+    conn.isolation_level = None
+    try:
+        SaleWriter()._commit_batch(conn, [(make_sale(produto_id), cancelled),
+                                          (make_sale(produto_id), kept)])
+    finally:
+        conn.close()
+
+    assert kept.result() > 0
+    assert stock(produto_id) == 4
+    assert sale_count() == 1
+
+
+def test_busy_lock_fails_with_database_busy_error(db):
+    produto_id = add_product(5)
+    writer = SaleWriter(lock_timeout=0.3)
+    timer = hold_write_lock(1.0)
+
+    with pytest.raises(DatabaseBusyError):
+        writer.write(make_sale(produto_id), timeout=5)
+    timer.join()
+    assert stock(produto_id) == 5
+
+
+def test_sale_waits_for_a_briefly_held_lock(db):
+    produto_id = add_product(5)
+    writer = SaleWriter(lock_timeout=5)
+    timer = hold_write_lock(0.3)
+
+    assert writer.write(make_sale(produto_id), timeout=5) > 0
+    timer.join()
+    assert stock(produto_id) == 4